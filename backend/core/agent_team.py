@@ -2,42 +2,136 @@
 AI Agent团队定义 - 模拟完整公司架构
 """
 import os
+import re
 import asyncio
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import cached_property, lru_cache
+from typing import Dict, Any, Optional, Tuple
 from crewai import Agent, Task, Crew, Process
 from crewai.tools import tool
 from langchain_community.tools import DuckDuckGoSearchResultsTool
 from dotenv import load_dotenv
 
+from core.cache import ResultCache, cached_result
+
 load_dotenv()
 
+# 各模式的结果缓存时长 (秒) - 用于 execute_task 执行的任务
+# 定时任务按日期单独缓存, 见 scheduler.JOB_RESULT_TTL
+MODE_CACHE_TTLS = {
+    "research": 60 * 60,
+    "develop": 6 * 60 * 60,
+    "analyze": 12 * 60 * 60,
+}
+
+# 各模式的任务模板: 模式 -> (负责角色, 任务描述模板, 期望输出)
+_MODE_TEMPLATES = {
+    # 市场研究流程 - CMO 分析市场
+    "research": (
+        "cmo",
+        "请深入分析以下市场领域：{task}\n\n要求：\n1. 市场规模和增长趋势\n2. 主要竞争对手分析\n3. 潜在机会和风险\n4. 建议的商业模式",
+        "详细的市场分析报告"
+    ),
+    # 开发流程 - CTO 技术研发
+    "develop": (
+        "cto",
+        "请研究和设计以下技术方案：{task}\n\n要求：\n1. 技术架构设计\n2. 核心功能实现\n3. 代码示例\n4. 技术难点分析",
+        "技术方案设计文档"
+    ),
+    # 分析流程 - COO 分析
+    "analyze": (
+        "coo",
+        "请分析以下内容：{task}\n\n要求：\n1. 数据收集和整理\n2. 深度分析\n3. 洞察和建议\n4. 结论总结",
+        "详细的分析报告"
+    ),
+}
+
+# 自动模式路由 - 按顺序匹配, 每个模式的关键词预编译为一个正则
+_MODE_ROUTES = [
+    ("research", re.compile("市场|趋势|机会|竞争")),
+    ("develop", re.compile("开发|代码|技术|系统")),
+    ("analyze", re.compile("分析|数据|报告")),
+]
+
 # ==================== 工具定义 ====================
 
+class _TTLCache:
+    """带过期时间的LRU缓存 - 用于网络型工具调用去重"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """读取未过期的结果"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: str):
+        """写入结果, 超出容量时淘汰最久未使用的"""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def cache_info(self) -> Dict[str, int]:
+        """命中统计"""
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._data)}
+
+# 搜索结果30分钟内复用
+_web_search_cache = _TTLCache(maxsize=512, ttl=30 * 60)
+
+@lru_cache(maxsize=None)
+def _get_search_tool() -> DuckDuckGoSearchResultsTool:
+    """搜索工具单例 - 首次使用时创建, 之后复用"""
+    return DuckDuckGoSearchResultsTool()
+
 @tool("web_search")
 def web_search(query: str) -> str:
     """搜索互联网获取最新信息"""
-    search = DuckDuckGoSearchResultsTool()
-    return search.run(query)
+    result = _web_search_cache.get(query)
+    if result is None:
+        result = _get_search_tool().run(query)
+        _web_search_cache.set(query, result)
+    return result
 
 @tool("analyze_data")
 def analyze_data(data: str) -> str:
     """分析数据并提供洞察"""
     return f"数据分析结果：{data[:500]}"
 
+def tool_cache_info() -> Dict[str, Dict[str, int]]:
+    """工具调用缓存统计"""
+    return {
+        "web_search": _web_search_cache.cache_info(),
+    }
+
 # ==================== Agent 工厂 ====================
 
 class AgentTeam:
-    """AI Agent团队"""
+    """AI Agent团队 - 各角色在首次使用时才创建"""
 
-    def __init__(self):
-        self.ceo = self._create_ceo()
-        self.cto = self._create_cto()
-        self.coo = self._create_coo()
-        self.cmo = self._create_cmo()
-        self.cpo = self._create_cpo()
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache if cache is not None else ResultCache()
 
-    def _create_ceo(self):
+    @cached_property
+    def ceo(self) -> Agent:
         """CEO - 首席执行官"""
         return Agent(
             role="首席执行官 (CEO)",
@@ -51,7 +145,8 @@ class AgentTeam:
             allow_delegation=True
         )
 
-    def _create_cto(self):
+    @cached_property
+    def cto(self) -> Agent:
         """CTO - 首席技术官"""
         return Agent(
             role="首席技术官 (CTO)",
@@ -66,7 +161,8 @@ class AgentTeam:
             allow_delegation=True
         )
 
-    def _create_coo(self):
+    @cached_property
+    def coo(self) -> Agent:
         """COO - 首席运营官"""
         return Agent(
             role="首席运营官 (COO)",
@@ -81,7 +177,8 @@ class AgentTeam:
             allow_delegation=True
         )
 
-    def _create_cmo(self):
+    @cached_property
+    def cmo(self) -> Agent:
         """CMO - 首席市场官"""
         return Agent(
             role="首席市场官 (CMO)",
@@ -96,7 +193,8 @@ class AgentTeam:
             allow_delegation=True
         )
 
-    def _create_cpo(self):
+    @cached_property
+    def cpo(self) -> Agent:
         """CPO - 首席产品官"""
         return Agent(
             role="首席产品官 (CPO)",
@@ -114,95 +212,47 @@ class AgentTeam:
     async def execute_task(self, task: str, mode: str = "auto") -> Dict[str, Any]:
         """执行任务"""
 
-        if mode == "research" or mode == "auto":
+        if mode == "auto":
             # 市场研究模式
-            return await self._run_research(task)
-        elif mode == "develop":
-            # 开发模式
-            return await self._run_develop(task)
-        elif mode == "analyze":
-            # 分析模式
-            return await self._run_analyze(task)
-        else:
-            # 自动模式 - 根据任务类型自动选择
-            return await self._run_auto(task)
-
-    async def _run_research(self, task: str) -> Dict[str, Any]:
-        """市场研究流程"""
-        # CMO 分析市场
-        market_task = Task(
-            description=f"请深入分析以下市场领域：{task}\n\n要求：\n1. 市场规模和增长趋势\n2. 主要竞争对手分析\n3. 潜在机会和风险\n4. 建议的商业模式",
-            agent=self.cmo,
-            expected_output="详细的市场分析报告"
-        )
-
-        crew = Crew(
-            agents=[self.cmo],
-            tasks=[market_task],
+            mode = "research"
+
+        if mode in _MODE_TEMPLATES:
+            return await self._run(mode, task)
+
+        # 自动模式 - 根据任务类型自动选择
+        return await self._run_auto(task)
+
+    def build_crew(self, mode: str, task: str) -> Crew:
+        """按模板构建指定模式的 Crew (可预先构建后重复 kickoff)"""
+        agent_name, template, expected_output = _MODE_TEMPLATES[mode]
+        agent = getattr(self, agent_name)
+
+        return Crew(
+            agents=[agent],
+            tasks=[Task(
+                description=template.format(task=task),
+                agent=agent,
+                expected_output=expected_output
+            )],
             process=Process.sequential,
             verbose=True
         )
 
+    async def kickoff(self, mode: str, task: str, crew: Crew) -> Dict[str, Any]:
+        """执行 Crew 并整理结果"""
         result = crew.kickoff()
 
         return {
-            "mode": "research",
+            "mode": mode,
             "task": task,
             "result": str(result),
             "timestamp": datetime.now().isoformat()
         }
 
-    async def _run_develop(self, task: str) -> Dict[str, Any]:
-        """开发流程"""
-        # CEO 制定策略
-        # CTO 技术研发
-        # CPO 执行开发
-
-        tech_task = Task(
-            description=f"请研究和设计以下技术方案：{task}\n\n要求：\n1. 技术架构设计\n2. 核心功能实现\n3. 代码示例\n4. 技术难点分析",
-            agent=self.cto,
-            expected_output="技术方案设计文档"
-        )
-
-        crew = Crew(
-            agents=[self.cto],
-            tasks=[tech_task],
-            process=Process.sequential,
-            verbose=True
-        )
-
-        result = crew.kickoff()
-
-        return {
-            "mode": "develop",
-            "task": task,
-            "result": str(result),
-            "timestamp": datetime.now().isoformat()
-        }
-
-    async def _run_analyze(self, task: str) -> Dict[str, Any]:
-        """分析流程"""
-        analysis_task = Task(
-            description=f"请分析以下内容：{task}\n\n要求：\n1. 数据收集和整理\n2. 深度分析\n3. 洞察和建议\n4. 结论总结",
-            agent=self.coo,
-            expected_output="详细的分析报告"
-        )
-
-        crew = Crew(
-            agents=[self.coo],
-            tasks=[analysis_task],
-            process=Process.sequential,
-            verbose=True
-        )
-
-        result = crew.kickoff()
-
-        return {
-            "mode": "analyze",
-            "task": task,
-            "result": str(result),
-            "timestamp": datetime.now().isoformat()
-        }
+    @cached_result(MODE_CACHE_TTLS)
+    async def _run(self, mode: str, task: str) -> Dict[str, Any]:
+        """按模式执行单个 Crew 流程"""
+        return await self.kickoff(mode, task, self.build_crew(mode, task))
 
     async def _run_auto(self, task: str) -> Dict[str, Any]:
         """自动流程 - 根据任务自动选择最佳流程"""
@@ -221,12 +271,9 @@ class AgentTeam:
 """
 
         # 简化处理
-        if any(keyword in task for keyword in ["市场", "趋势", "机会", "竞争"]):
-            return await self._run_research(task)
-        elif any(keyword in task for keyword in ["开发", "代码", "技术", "系统"]):
-            return await self._run_develop(task)
-        elif any(keyword in task for keyword in ["分析", "数据", "报告"]):
-            return await self._run_analyze(task)
-        else:
-            # 默认执行综合分析
-            return await self._run_analyze(task)
+        for mode, pattern in _MODE_ROUTES:
+            if pattern.search(task):
+                return await self._run(mode, task)
+
+        # 默认执行综合分析
+        return await self._run("analyze", task)
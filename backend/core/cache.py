@@ -0,0 +1,98 @@
+"""
+结果缓存 - 按 (mode, task) 精确匹配缓存 Crew 执行结果
+"""
+import asyncio
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import orjson
+
+class ResultCache:
+    """基于SQLite的任务结果缓存, 命中时跳过整次LLM调用"""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            db_path = Path(__file__).parent.parent.parent / "data" / "nexus_ai.db"
+        else:
+            db_path = Path(db_path)
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute('''CREATE TABLE IF NOT EXISTS kv_cache (
+            key TEXT PRIMARY KEY,
+            mode TEXT,
+            result TEXT,
+            created_at REAL,
+            ttl INTEGER
+        )''')
+
+    @staticmethod
+    def make_key(mode: str, task: str) -> str:
+        """缓存键 - (mode, task) 的哈希"""
+        return hashlib.sha256(f"{mode}\0{task}".encode()).hexdigest()
+
+    def get(self, mode: str, task: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存结果"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM kv_cache WHERE key = ? AND created_at + ttl > ?",
+                (self.make_key(mode, task), time.time())
+            ).fetchone()
+
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, mode: str, task: str, result: Dict[str, Any], ttl: int):
+        """写入缓存结果, 同时清理已过期的条目"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM kv_cache WHERE created_at + ttl <= ?", (now,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv_cache (key, mode, result, created_at, ttl) VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(mode, task), mode, orjson.dumps(result).decode(), now, ttl)
+            )
+
+    def clear(self, mode: str = None):
+        """清除缓存 (可按模式)"""
+        with self._lock:
+            if mode:
+                self._db.execute("DELETE FROM kv_cache WHERE mode = ?", (mode,))
+            else:
+                self._db.execute("DELETE FROM kv_cache")
+
+def cached_result(ttls: Dict[str, int]):
+    """装饰 AgentTeam._run(mode, task), 按 (mode, task) 缓存结果
+
+    ttls 为各模式的缓存时长 (秒), 未列出的模式不缓存。
+    被装饰对象需提供 `cache` 属性 (ResultCache 或 None)。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, mode: str, task: str) -> Dict[str, Any]:
+            cache: Optional[ResultCache] = self.cache
+            ttl = ttls.get(mode)
+            if cache is None or ttl is None:
+                return await func(self, mode, task)
+
+            cached = await asyncio.to_thread(cache.get, mode, task)
+            if cached is not None:
+                # 命中时返回新的时间戳
+                cached["timestamp"] = datetime.now().isoformat()
+                cached["cached"] = True
+                return cached
+
+            result = await func(self, mode, task)
+            await asyncio.to_thread(cache.set, mode, task, result, ttl)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,11 +1,71 @@
 """
 记忆系统 - 存储任务结果和学习经验
 """
-import json
+import asyncio
 import os
+import threading
+import itertools
+from collections import defaultdict, deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Deque, Dict, Any, List, Optional, Set
+
+import orjson
+from loguru import logger
+
+# 任务记忆只保留最近的条数
+MAX_RECENT_TASKS = 100
+
+def _bigrams(text: str) -> Set[str]:
+    """切分为字符二元组 (兼容中文, 中文没有空格分词)"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+class _BigramIndex:
+    """倒排索引 - 二元组 -> 文档ID, 用于子串搜索的候选过滤"""
+
+    def __init__(self, field: str):
+        self.field = field
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._docs: Dict[int, Dict] = {}
+        self._texts: Dict[int, str] = {}
+        self._next_id = 0
+
+    def add(self, entry: Dict):
+        """添加文档 (按插入顺序分配ID)"""
+        doc_id = self._next_id
+        self._next_id += 1
+
+        text = str(entry.get(self.field, "")).lower()
+        self._docs[doc_id] = entry
+        self._texts[doc_id] = text
+        for gram in _bigrams(text):
+            self._postings[gram].add(doc_id)
+
+    def pop_oldest(self):
+        """移除最早加入的文档"""
+        doc_id = next(iter(self._docs))
+        del self._docs[doc_id]
+        for gram in _bigrams(self._texts.pop(doc_id)):
+            postings = self._postings[gram]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, keyword: str) -> List[Dict]:
+        """返回包含 keyword 子串的文档 (按插入顺序)"""
+        keyword = keyword.lower()
+        grams = _bigrams(keyword)
+
+        if grams:
+            # 候选集为所有二元组倒排列表的交集, 从最短的开始
+            postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            doc_ids = sorted(candidates)
+        else:
+            # 单字符/空关键词无法用二元组过滤, 退化为全量扫描
+            doc_ids = list(self._docs)
+
+        return [self._docs[i] for i in doc_ids if keyword in self._texts[i]]
 
 class MemorySystem:
     """长期记忆系统"""
@@ -28,75 +88,117 @@ class MemorySystem:
         if not self.insights_file.exists():
             self._write_json(self.insights_file, [])
 
+        # 内存缓存 - 只在初始化时解析一次, 之后仅在修改时落盘
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # 环形缓冲 - 追加时自动淘汰最旧的, 无需切片复制
+        self._tasks: Deque[Dict] = deque(self._read_json(self.tasks_file), maxlen=MAX_RECENT_TASKS)
+        self._insights: List[Dict] = self._read_json(self.insights_file)
+
+        # 搜索索引
+        self._task_index = _BigramIndex("task")
+        self._insight_index = _BigramIndex("content")
+        for task in self._tasks:
+            self._task_index.add(task)
+        for insight in self._insights:
+            self._insight_index.add(insight)
+
+        # 脏标记 - 写入合并后由 flush() 统一落盘
+        self._dirty_tasks = False
+        self._dirty_insights = False
+
     def _read_json(self, file_path: Path) -> Any:
         """读取JSON文件"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return orjson.loads(file_path.read_bytes())
         except Exception:
             return []
 
     def _write_json(self, file_path: Path, data: Any):
         """写入JSON文件"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # orjson 始终输出UTF-8, 无需 ensure_ascii
+        file_path.write_bytes(
+            orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+        )
+
+    def flush(self):
+        """将有修改的记忆写回磁盘"""
+        # 在锁内取快照, 锁外写文件, 避免写盘期间阻塞读写方
+        with self._flush_lock:
+            with self._lock:
+                tasks = list(self._tasks) if self._dirty_tasks else None
+                insights = list(self._insights) if self._dirty_insights else None
+                self._dirty_tasks = False
+                self._dirty_insights = False
+
+            try:
+                if tasks is not None:
+                    self._write_json(self.tasks_file, tasks)
+                    tasks = None
+                if insights is not None:
+                    self._write_json(self.insights_file, insights)
+            except Exception:
+                # 写入失败, 恢复未写入部分的脏标记, 下次重试
+                with self._lock:
+                    self._dirty_tasks = self._dirty_tasks or tasks is not None
+                    self._dirty_insights = self._dirty_insights or insights is not None
+                raise
+
+    async def flush_loop(self, interval: float = 2.0):
+        """后台定期落盘, 突发写入合并为一次"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"记忆写入失败: {e}")
 
     def save_task_result(self, task: str, result: Any):
         """保存任务结果"""
-        tasks = self._read_json(self.tasks_file)
-
-        tasks.append({
-            "task": task,
-            "result": str(result)[:2000],  # 限制长度
-            "timestamp": datetime.now().isoformat()
-        })
-
-        # 只保留最近100条
-        if len(tasks) > 100:
-            tasks = tasks[-100:]
-
-        self._write_json(self.tasks_file, tasks)
+        with self._lock:
+            entry = {
+                "task": task,
+                "result": str(result)[:2000],  # 限制长度
+                "timestamp": datetime.now().isoformat()
+            }
+            # 只保留最近100条 - 缓冲区已满时最旧的一条会被挤出
+            if len(self._tasks) == self._tasks.maxlen:
+                self._task_index.pop_oldest()
+            self._tasks.append(entry)
+            self._task_index.add(entry)
+
+            self._dirty_tasks = True
 
     def get_recent_tasks(self, limit: int = 10) -> List[Dict]:
         """获取最近的任务"""
-        tasks = self._read_json(self.tasks_file)
-        return tasks[-limit:] if len(tasks) >= limit else tasks
+        with self._lock:
+            size = len(self._tasks)
+            start = size - limit if 0 < limit < size else 0
+            return list(itertools.islice(self._tasks, start, None))
 
     def save_insight(self, category: str, content: str):
         """保存洞察"""
-        insights = self._read_json(self.insights_file)
-
-        insights.append({
-            "category": category,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
+        with self._lock:
+            entry = {
+                "category": category,
+                "content": content,
+                "timestamp": datetime.now().isoformat()
+            }
+            self._insights.append(entry)
+            self._insight_index.add(entry)
 
-        self._write_json(self.insights_file, insights)
+            self._dirty_insights = True
 
     def get_insights(self, category: str = None) -> List[Dict]:
         """获取洞察"""
-        insights = self._read_json(self.insights_file)
-
-        if category:
-            return [i for i in insights if i.get("category") == category]
+        with self._lock:
+            if category:
+                return [i for i in self._insights if i.get("category") == category]
 
-        return insights
+            return list(self._insights)
 
     def search(self, keyword: str) -> List[Dict]:
         """搜索记忆"""
-        results = []
-
-        # 搜索任务
-        tasks = self._read_json(self.tasks_file)
-        for task in tasks:
-            if keyword.lower() in str(task.get("task", "")).lower():
-                results.append(task)
-
-        # 搜索洞察
-        insights = self._read_json(self.insights_file)
-        for insight in insights:
-            if keyword.lower() in str(insight.get("content", "")).lower():
-                results.append(insight)
-
-        return results
+        with self._lock:
+            # 先任务后洞察
+            return self._task_index.search(keyword) + self._insight_index.search(keyword)
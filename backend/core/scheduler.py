@@ -2,11 +2,21 @@
 任务调度器 - 实现24/7自动运行
 """
 import asyncio
-from datetime import datetime
+from datetime import date, datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from loguru import logger
-from typing import Optional
+from typing import Dict, Any, Optional
+
+# 每日固定执行的任务: job_id -> (模式, 任务描述)
+RECURRING_JOBS = {
+    "market_scan": ("research", "扫描AI行业最新动态，识别潜在商业机会"),
+    "strategy_meeting": ("analyze", "基于当前市场情况，制定本周工作计划和优先级"),
+    "daily_summary": ("analyze", "总结今天的工作成果和经验教训"),
+}
+
+# 每日任务结果的缓存时长 - 同一天内重启不重复执行
+JOB_RESULT_TTL = 24 * 60 * 60
 
 class TaskScheduler:
     """定时任务调度器"""
@@ -22,6 +32,10 @@ class TaskScheduler:
     def _setup_jobs(self):
         """设置定时任务"""
 
+        # 固定任务的 Crew 模板在首次执行时构建, 之后每次触发直接 kickoff
+        # (不在此处构建, 以免启动调度器时就创建各角色 Agent)
+        self._crews: Dict[str, Any] = {}
+
         # 早上9点 - 市场扫描
         self.scheduler.add_job(
             self.market_scan,
@@ -87,14 +101,38 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"启动任务失败: {e}")
 
+    async def _run_recurring(self, job_id: str) -> Dict[str, Any]:
+        """执行固定任务, 当天已有结果时直接复用"""
+        mode, task = RECURRING_JOBS[job_id]
+        cache = self.agent_team.cache
+        cache_mode, cache_key = f"job:{job_id}", date.today().isoformat()
+
+        if cache:
+            cached = await asyncio.to_thread(cache.get, cache_mode, cache_key)
+            if cached is not None:
+                logger.info(f"{job_id} 今日已执行, 复用结果")
+                return cached
+
+        crew = self._crews.get(job_id)
+        if crew is None:
+            crew = self._crews[job_id] = self.agent_team.build_crew(mode, task)
+
+        result = await self.agent_team.kickoff(mode, task, crew)
+
+        if cache:
+            await asyncio.to_thread(cache.set, cache_mode, cache_key, result, JOB_RESULT_TTL)
+
+        return result
+
     async def market_scan(self):
         """每日市场扫描"""
         logger.info("📊 执行每日市场扫描...")
         try:
-            result = await self.agent_team.execute_task(
-                "扫描AI行业最新动态，识别潜在商业机会",
-                mode="research"
-            )
+            # 每日扫描是研究结果的刷新边界, 先清除研究缓存
+            if self.agent_team.cache:
+                await asyncio.to_thread(self.agent_team.cache.clear, "research")
+
+            result = await self._run_recurring("market_scan")
             logger.info(f"市场扫描完成")
             return result
         except Exception as e:
@@ -104,10 +142,7 @@ class TaskScheduler:
         """策略会议"""
         logger.info("💼 执行策略会议...")
         try:
-            result = await self.agent_team.execute_task(
-                "基于当前市场情况，制定本周工作计划和优先级",
-                mode="analyze"
-            )
+            result = await self._run_recurring("strategy_meeting")
             logger.info(f"策略会议完成")
             return result
         except Exception as e:
@@ -123,10 +158,7 @@ class TaskScheduler:
         """每日总结"""
         logger.info("📝 执行每日总结...")
         try:
-            result = await self.agent_team.execute_task(
-                "总结今天的工作成果和经验教训",
-                mode="analyze"
-            )
+            result = await self._run_recurring("daily_summary")
             logger.info(f"每日总结完成")
             return result
         except Exception as e:
@@ -2,26 +2,28 @@
 Nexus-AI 主入口 - FastAPI服务 + WebSocket实时通信
 """
 import asyncio
-import json
+import contextlib
 import os
 import sys
 import signal
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from loguru import logger
+import orjson
 import sqlite3
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.scheduler import TaskScheduler
-from core.agent_team import AgentTeam
+from core.agent_team import AgentTeam, tool_cache_info
 from core.memory import MemorySystem
 
 # ==================== 配置 ====================
@@ -40,22 +42,19 @@ logger.add(
 # 数据库
 DB_PATH = Path(__file__).parent.parent / "data" / "nexus_ai.db"
 
+# /logs 单次最多返回的条数
+MAX_LOGS_LIMIT = 1000
+
 # ==================== 数据模型 ====================
 
 class TaskRequest(BaseModel):
     task: str
     mode: str = "auto"  # auto, research, develop, analyze
 
-class SystemStatus(BaseModel):
-    status: str
-    uptime: float
-    active_agents: int
-    tasks_completed: int
-    current_task: Optional[str] = None
-
 # ==================== 应用初始化 ====================
 
-app = FastAPI(title="Nexus-AI API", version="1.0.0")
+# 默认使用 orjson 序列化响应
+app = FastAPI(title="Nexus-AI API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -74,16 +73,32 @@ class AppState:
         self.agent_team: Optional[AgentTeam] = None
         self.scheduler: Optional[TaskScheduler] = None
         self.memory: Optional[MemorySystem] = None
+        self.memory_flush_task: Optional[asyncio.Task] = None
         self.active_tasks: Dict[str, Any] = {}
-        self.websocket_connections: List[WebSocket] = []
+        self.websocket_connections: Set[WebSocket] = set()
+
+        # 日志写入队列, 由后台任务批量落库
+        self.log_queue: asyncio.Queue = asyncio.Queue()
+        self.log_writer_task: Optional[asyncio.Task] = None
+
+        # 待广播的日志, 由后台任务定时合并为一帧发送
+        self.pending_logs: List[Dict[str, str]] = []
+        self.log_broadcaster_task: Optional[asyncio.Task] = None
 
         # 初始化数据库
         self.init_db()
 
     def init_db(self):
         """初始化数据库"""
-        conn = sqlite3.connect(str(DB_PATH))
-        c = conn.cursor()
+        # 全局共享单个连接, 避免每个请求重复 connect/close
+        # WAL 模式下读写互不阻塞, synchronous=NORMAL 减少 fsync
+        self.db = sqlite3.connect(str(DB_PATH), check_same_thread=False, isolation_level=None)
+        self.db_lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+
+        c = self.db.cursor()
 
         # 任务记录表
         c.execute('''CREATE TABLE IF NOT EXISTS tasks (
@@ -111,71 +126,135 @@ class AppState:
             tasks_completed INTEGER DEFAULT 0
         )''')
 
-        conn.commit()
-        conn.close()
+        # 索引 - 加速状态统计和按时间倒序分页
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at DESC)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs(timestamp DESC)")
+
+        # 已完成任务数只在启动时统计一次, 之后由 execute_task 累加
+        c.execute("SELECT COUNT(*) FROM tasks WHERE status = 'completed'")
+        self.tasks_completed: int = c.fetchone()[0]
 
 state = AppState()
 
+# ==================== 数据库操作 ====================
+# 同步实现, 在异步处理函数中通过 asyncio.to_thread 调用, 避免阻塞事件循环
+
+def db_execute(sql: str, params: tuple = ()) -> int:
+    """执行写语句, 返回 lastrowid"""
+    with state.db_lock:
+        c = state.db.cursor()
+        c.execute(sql, params)
+        return c.lastrowid
+
+def db_fetchall(sql: str, params: tuple = ()) -> List[tuple]:
+    """执行查询语句, 返回全部行"""
+    with state.db_lock:
+        c = state.db.cursor()
+        c.execute(sql, params)
+        return c.fetchall()
+
+def db_executemany(sql: str, rows: List[tuple]):
+    """批量执行写语句, 单个事务内提交"""
+    with state.db_lock:
+        c = state.db.cursor()
+        c.execute("BEGIN")
+        try:
+            c.executemany(sql, rows)
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+
 # ==================== WebSocket 广播 ====================
 
 async def broadcast_to_websockets(message: dict):
     """广播消息到所有WebSocket连接"""
-    message_str = json.dumps(message)
-    disconnected = []
-
-    for ws in state.websocket_connections:
-        try:
-            await ws.send_text(message_str)
-        except Exception:
-            disconnected.append(ws)
+    # 前端按文本帧 JSON.parse, 因此解码为 str 后发送
+    message_str = orjson.dumps(message).decode()
+    connections = list(state.websocket_connections)
+
+    # 只序列化一次, 并发发送到所有连接
+    results = await asyncio.gather(
+        *(ws.send_text(message_str) for ws in connections),
+        return_exceptions=True
+    )
 
     # 清理断开的连接
-    for ws in disconnected:
-        state.websocket_connections.remove(ws)
+    for ws, result in zip(connections, results):
+        if isinstance(result, Exception):
+            state.websocket_connections.discard(ws)
 
 async def log_to_all(message: str, level: str = "info"):
     """日志记录并广播"""
     logger.info(message)
 
-    # 保存到数据库
-    conn = sqlite3.connect(str(DB_PATH))
-    c = conn.cursor()
-    c.execute("INSERT INTO logs (level, message) VALUES (?, ?)", (level, message))
-    conn.commit()
-    conn.close()
+    # 加入写入队列, 由 log_writer 批量落库
+    # 时间格式与 CURRENT_TIMESTAMP 保持一致 (UTC)
+    state.log_queue.put_nowait(
+        (level, message, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+    )
 
-    # 广播
-    await broadcast_to_websockets({
-        "type": "log",
+    # 广播 - 由 log_broadcaster 合并发送
+    state.pending_logs.append({
         "level": level,
         "message": message,
         "timestamp": datetime.now().isoformat()
     })
 
+LOG_BROADCAST_INTERVAL = 0.1
+
+async def log_broadcaster():
+    """后台任务 - 每100ms将新日志合并为一个 log_batch 帧广播"""
+    while True:
+        await asyncio.sleep(LOG_BROADCAST_INTERVAL)
+        if state.pending_logs:
+            batch, state.pending_logs = state.pending_logs, []
+            await broadcast_to_websockets({"type": "log_batch", "entries": batch})
+
+# ==================== 日志批量写入 ====================
+
+LOG_INSERT_SQL = "INSERT INTO logs (level, message, timestamp) VALUES (?, ?, ?)"
+LOG_BATCH_SIZE = 500
+LOG_FLUSH_INTERVAL = 1.0
+
+def drain_log_queue(first: Optional[tuple] = None) -> List[tuple]:
+    """取出队列中已有的日志, 最多 LOG_BATCH_SIZE 条"""
+    batch = [first] if first else []
+    while not state.log_queue.empty() and len(batch) < LOG_BATCH_SIZE:
+        batch.append(state.log_queue.get_nowait())
+    return batch
+
+async def log_writer():
+    """后台任务 - 每秒将排队的日志合并为一次 executemany 写入"""
+    while True:
+        batch = drain_log_queue(await state.log_queue.get())
+        try:
+            await asyncio.to_thread(db_executemany, LOG_INSERT_SQL, batch)
+        except Exception as e:
+            logger.error(f"日志写入失败: {e}")
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+
 # ==================== API 路由 ====================
 
 @app.get("/")
 async def root():
     return {"message": "Nexus-AI API Running", "version": "1.0.0"}
 
-@app.get("/status")
-async def get_status() -> SystemStatus:
+@app.get("/status", response_model=None)
+async def get_status():
     """获取系统状态"""
     uptime = (datetime.now() - state.start_time).total_seconds()
 
-    conn = sqlite3.connect(str(DB_PATH))
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM tasks WHERE status = 'completed'")
-    tasks_completed = c.fetchone()[0]
-    conn.close()
-
-    return SystemStatus(
-        status="running" if state.running else "stopped",
-        uptime=uptime,
-        active_agents=len(state.active_tasks),
-        tasks_completed=tasks_completed,
-        current_task=list(state.active_tasks.keys())[0] if state.active_tasks else None
-    )
+    # 看板高频轮询, 直接返回响应, 跳过模型校验和 jsonable_encoder
+    return ORJSONResponse({
+        "status": "running" if state.running else "stopped",
+        "uptime": uptime,
+        "active_agents": len(state.active_tasks),
+        "tasks_completed": state.tasks_completed,
+        "current_task": next(iter(state.active_tasks), None),
+        "tool_cache": tool_cache_info()
+    })
 
 @app.post("/tasks")
 async def create_task(request: TaskRequest):
@@ -185,15 +264,11 @@ async def create_task(request: TaskRequest):
     await log_to_all(f"📝 新任务创建: {request.task}")
 
     # 保存到数据库
-    conn = sqlite3.connect(str(DB_PATH))
-    c = conn.cursor()
-    c.execute(
+    task_db_id = await asyncio.to_thread(
+        db_execute,
         "INSERT INTO tasks (task_name, status) VALUES (?, ?)",
         (request.task, "running")
     )
-    task_db_id = c.lastrowid
-    conn.commit()
-    conn.close()
 
     # 更新状态
     state.active_tasks[task_id] = {
@@ -219,42 +294,33 @@ async def create_task(request: TaskRequest):
 @app.get("/tasks")
 async def get_tasks():
     """获取所有任务"""
-    conn = sqlite3.connect(str(DB_PATH))
-    c = conn.cursor()
-    c.execute("SELECT id, task_name, status, created_at, completed_at FROM tasks ORDER BY created_at DESC LIMIT 50")
-    rows = c.fetchall()
-    conn.close()
-
-    tasks = []
-    for row in rows:
-        tasks.append({
-            "id": row[0],
-            "name": row[1],
-            "status": row[2],
-            "created_at": row[3],
-            "completed_at": row[4]
-        })
+    rows = await asyncio.to_thread(
+        db_fetchall,
+        "SELECT id, task_name, status, created_at, completed_at FROM tasks ORDER BY created_at DESC LIMIT 50"
+    )
 
-    return tasks
+    # 直接返回响应, 跳过 FastAPI 的 jsonable_encoder
+    return ORJSONResponse([
+        {"id": id_, "name": name, "status": status, "created_at": created_at, "completed_at": completed_at}
+        for id_, name, status, created_at, completed_at in rows
+    ])
 
 @app.get("/logs")
 async def get_logs(limit: int = 100):
     """获取系统日志"""
-    conn = sqlite3.connect(str(DB_PATH))
-    c = conn.cursor()
-    c.execute(f"SELECT level, message, timestamp FROM logs ORDER BY timestamp DESC LIMIT {limit}")
-    rows = c.fetchall()
-    conn.close()
-
-    logs = []
-    for row in rows:
-        logs.append({
-            "level": row[0],
-            "message": row[1],
-            "timestamp": row[2]
-        })
+    # 参数绑定, 连接的语句缓存可复用已编译的查询
+    # 限制范围, SQLite 中负数 LIMIT 表示不限制
+    limit = max(0, min(limit, MAX_LOGS_LIMIT))
+    rows = await asyncio.to_thread(
+        db_fetchall,
+        "SELECT level, message, timestamp FROM logs ORDER BY timestamp DESC LIMIT ?",
+        (limit,)
+    )
 
-    return logs
+    return ORJSONResponse([
+        {"level": level, "message": message, "timestamp": timestamp}
+        for level, message, timestamp in rows
+    ])
 
 @app.post("/start")
 async def start_system():
@@ -275,7 +341,9 @@ async def start_system():
 
     # 初始化记忆系统
     if not state.memory:
-        state.memory = MemorySystem()
+        # 加载记忆文件并建立索引, 放到线程中执行
+        state.memory = await asyncio.to_thread(MemorySystem)
+        state.memory_flush_task = asyncio.create_task(state.memory.flush_loop())
 
     # 启动定时任务
     asyncio.create_task(state.scheduler.start())
@@ -290,6 +358,9 @@ async def stop_system():
     if state.scheduler:
         state.scheduler.stop()
 
+    if state.memory:
+        await asyncio.to_thread(state.memory.flush)
+
     await log_to_all("🛑 Nexus-AI 系统已停止")
 
     return {"message": "系统已停止"}
@@ -298,15 +369,15 @@ async def stop_system():
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket实时通信"""
     await websocket.accept()
-    state.websocket_connections.append(websocket)
+    state.websocket_connections.add(websocket)
 
     try:
         # 发送欢迎消息
-        await websocket.send_json({
+        await websocket.send_text(orjson.dumps({
             "type": "connected",
             "message": "已连接到Nexus-AI实时监控",
             "timestamp": datetime.now().isoformat()
-        })
+        }).decode())
 
         # 保持连接
         while True:
@@ -315,7 +386,10 @@ async def websocket_endpoint(websocket: WebSocket):
             pass
 
     except WebSocketDisconnect:
-        state.websocket_connections.remove(websocket)
+        pass
+
+    finally:
+        state.websocket_connections.discard(websocket)
 
 # ==================== 任务执行 ====================
 
@@ -327,28 +401,29 @@ async def execute_task(task_id: str, task: str, mode: str):
         # 执行任务
         result = await state.agent_team.execute_task(task, mode)
 
+        # 结果字典只转换一次字符串, 数据库/记忆/广播共用
+        result_str = str(result)
+
         # 更新数据库
-        conn = sqlite3.connect(str(DB_PATH))
-        c = conn.cursor()
-        c.execute(
+        await asyncio.to_thread(
+            db_execute,
             "UPDATE tasks SET status = ?, result = ?, completed_at = ? WHERE id = ?",
-            ("completed", str(result), datetime.now(), state.active_tasks[task_id]["db_id"])
+            ("completed", result_str, datetime.now(), state.active_tasks[task_id]["db_id"])
         )
-        conn.commit()
-        conn.close()
+        state.tasks_completed += 1
 
         # 完成任务
         await log_to_all(f"✅ 任务完成: {task}")
 
         # 保存结果到记忆
         if state.memory:
-            state.memory.save_task_result(task, result)
+            state.memory.save_task_result(task, result_str)
 
         # 广播完成
         await broadcast_to_websockets({
             "type": "task_completed",
             "task_id": task_id,
-            "result": str(result)[:500],
+            "result": result_str[:500],
             "timestamp": datetime.now().isoformat()
         })
 
@@ -357,14 +432,11 @@ async def execute_task(task_id: str, task: str, mode: str):
         await log_to_all(f"❌ 任务失败: {str(e)}", "error")
 
         # 更新数据库
-        conn = sqlite3.connect(str(DB_PATH))
-        c = conn.cursor()
-        c.execute(
+        await asyncio.to_thread(
+            db_execute,
             "UPDATE tasks SET status = ?, result = ? WHERE id = ?",
             ("failed", str(e), state.active_tasks[task_id]["db_id"])
         )
-        conn.commit()
-        conn.close()
 
     finally:
         # 清理状态
@@ -377,22 +449,54 @@ async def execute_task(task_id: str, task: str, mode: str):
 async def startup_event():
     """启动时初始化"""
     logger.info("Nexus-AI Backend Starting...")
+    state.log_writer_task = asyncio.create_task(log_writer())
+    state.log_broadcaster_task = asyncio.create_task(log_broadcaster())
     await log_to_all("🔵 Nexus-AI Backend 启动完成")
 
+async def cancel_background_task(task: Optional[asyncio.Task]):
+    """取消后台任务并等待其退出"""
+    if task is None:
+        return
+
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """关闭时清理"""
     logger.info("Nexus-AI Backend Shutting Down...")
     state.running = False
 
+    # 落盘尚未写入的记忆
+    # flush 内部持有 _flush_lock, 已在线程中执行的写入完成后才会再次写入
+    await cancel_background_task(state.memory_flush_task)
+    if state.memory:
+        await asyncio.to_thread(state.memory.flush)
+
+    # 写入剩余日志
+    await cancel_background_task(state.log_writer_task)
+    await cancel_background_task(state.log_broadcaster_task)
+    while not state.log_queue.empty():
+        db_executemany(LOG_INSERT_SQL, drain_log_queue())
+
+    # 持锁关闭, 等待仍在工作线程中执行的写入结束
+    with state.db_lock:
+        state.db.close()
+
 # ==================== 主程序 ====================
 
 if __name__ == "__main__":
     import uvicorn
 
+    # uvloop 事件循环 + httptools C解析器 (均由 uvicorn[standard] 提供)
+    # 保持单 worker: AppState、调度器和日志队列都在进程内存中,
+    # 多 worker 会重复运行定时任务且各自持有不同的状态
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
@@ -63,6 +63,10 @@ export default function Dashboard() {
             message: data.message,
             timestamp: data.timestamp
           }])
+        } else if (data.type === 'log_batch') {
+          // 后端每100ms合并发送的日志
+          const entries: LogMessage[] = data.entries
+          setLogs(prev => [...prev, ...entries].slice(-101))
         } else if (data.type === 'task_started' || data.type === 'task_completed') {
           fetchStatus()
           fetchTasks()